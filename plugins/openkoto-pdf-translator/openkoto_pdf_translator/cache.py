@@ -1,6 +1,8 @@
 import logging
 import os
 import json
+import threading
+from collections import OrderedDict
 from peewee import Model, SqliteDatabase, AutoField, CharField, TextField, SQL
 from typing import Optional
 
@@ -9,6 +11,12 @@ from typing import Optional
 db = SqliteDatabase(None)
 logger = logging.getLogger(__name__)
 
+# In-process LRU in front of sqlite, keyed by (engine, engine params, text).
+# Repeated paragraphs (headers, footers, re-translations) skip the db query.
+_MEMORY_CACHE_SIZE = 4096
+_memory_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
 
 class _TranslationCache(Model):
     id = AutoField()
@@ -73,17 +81,39 @@ class TranslationCache:
         self.params[k] = v
         self.replace_params(self.params)
 
-    # Since peewee and the underlying sqlite are thread-safe,
-    # get and set operations don't need locks.
+    def _memory_key(self, original_text: str) -> tuple:
+        return (self.translate_engine, self.translate_engine_params, original_text)
+
+    # The in-memory LRU is shared by all translation threads,
+    # so every access to it goes through _memory_cache_lock.
+    def _remember(self, key: tuple, translation: str):
+        with _memory_cache_lock:
+            _memory_cache[key] = translation
+            _memory_cache.move_to_end(key)
+            if len(_memory_cache) > _MEMORY_CACHE_SIZE:
+                _memory_cache.popitem(last=False)
+
     def get(self, original_text: str) -> Optional[str]:
+        key = self._memory_key(original_text)
+        with _memory_cache_lock:
+            translation = _memory_cache.get(key)
+            if translation is not None:
+                _memory_cache.move_to_end(key)
+                return translation
+        # peewee and the underlying sqlite are thread-safe,
+        # so the db lookup itself runs without a lock.
         result = _TranslationCache.get_or_none(
             translate_engine=self.translate_engine,
             translate_engine_params=self.translate_engine_params,
             original_text=original_text,
         )
-        return result.translation if result else None
+        if result is None:
+            return None
+        self._remember(key, result.translation)
+        return result.translation
 
     def set(self, original_text: str, translation: str):
+        self._remember(self._memory_key(original_text), translation)
         try:
             _TranslationCache.create(
                 translate_engine=self.translate_engine,
@@ -95,23 +125,29 @@ class TranslationCache:
             logger.debug(f"Error setting cache: {e}")
 
 
+def _remove_db_files(db_path: str):
+    # Remove the database together with its WAL/SHM side files,
+    # a stale WAL must never be replayed into a new database.
+    for suffix in ["", "-wal", "-shm"]:
+        p = db_path + suffix
+        if os.path.exists(p):
+            os.remove(p)
+
+
 def init_db(remove_exists=False):
     cache_folder = os.path.join(os.path.expanduser("~"), ".cache", "pdf2zh")
     os.makedirs(cache_folder, exist_ok=True)
     # The current version does not support database migration, so add the version number to the file name.
     cache_db_path = os.path.join(cache_folder, "cache.v1.db")
     if remove_exists and os.path.exists(cache_db_path):
-        os.remove(cache_db_path)
+        _remove_db_files(cache_db_path)
+        with _memory_cache_lock:
+            _memory_cache.clear()
 
     # If existing db is not writable (e.g. owned by root), remove and recreate
     if os.path.exists(cache_db_path) and not os.access(cache_db_path, os.W_OK):
         try:
-            os.remove(cache_db_path)
-            # Also remove WAL/SHM files if present
-            for suffix in ["-wal", "-shm"]:
-                p = cache_db_path + suffix
-                if os.path.exists(p):
-                    os.remove(p)
+            _remove_db_files(cache_db_path)
         except OSError:
             logger.warning(f"Cannot remove unwritable cache db: {cache_db_path}")
 
@@ -142,21 +178,15 @@ def init_test_db():
     test_db.bind([_TranslationCache], bind_refs=False, bind_backrefs=False)
     test_db.connect()
     test_db.create_tables([_TranslationCache], safe=True)
+    with _memory_cache_lock:
+        _memory_cache.clear()
     return test_db
 
 
 def clean_test_db(test_db):
     test_db.drop_tables([_TranslationCache])
     test_db.close()
-    db_path = test_db.database
-    if os.path.exists(db_path):
-        os.remove(test_db.database)
-    wal_path = db_path + "-wal"
-    if os.path.exists(wal_path):
-        os.remove(wal_path)
-    shm_path = db_path + "-shm"
-    if os.path.exists(shm_path):
-        os.remove(shm_path)
+    _remove_db_files(test_db.database)
 
 
 init_db()
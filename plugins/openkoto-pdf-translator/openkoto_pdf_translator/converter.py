@@ -4,7 +4,7 @@ import re
 import unicodedata
 from enum import Enum
 from string import Template
-from typing import Dict
+from typing import Dict, Iterable
 
 import numpy as np
 from pdfminer.converter import PDFConverter
@@ -45,6 +45,74 @@ from .openkoto_translator import OpenKotoTranslator
 
 log = logging.getLogger(__name__)
 
+# Unicode categories treated as formula characters: modifiers, math symbols, separators
+FORMULA_CATEGORIES = frozenset(("Lm", "Mn", "Sk", "Sm", "Zl", "Zp", "Zs"))
+# Unicode categories of modifier characters, which take no horizontal advance
+MODIFIER_CATEGORIES = frozenset(("Lm", "Mn", "Sk"))
+
+# Font names of LaTeX / math / monospace fonts, whose glyphs are kept as formulas
+LATEX_FONT_PATTERN = re.compile(
+    r"(CM[^R]|MS.M|XY|MT|BL|RM|EU|LA|RS|LINE|LCIRCLE|TeX-|rsfs|txsy|wasy|stmary|.*Mono|.*Code|.*Ital|.*Sym|.*Math)"
+)
+# Formula placeholder as returned by the translator, e.g. "{v1}" or "{ V 1 }"
+FORMULA_PLACEHOLDER_PATTERN = re.compile(r"\{\s*v([\d\s]+)\}", re.IGNORECASE)
+# A paragraph made of a single formula placeholder, which is not translated
+FORMULA_ONLY_PATTERN = re.compile(r"^\{v\d+\}$")
+
+# service name -> translator class, e.g. "google" -> GoogleTranslator
+TRANSLATOR_MAP: Dict[str, type[BaseTranslator]] = {
+    translator.name: translator
+    for translator in [
+        OpenKotoTranslator,
+        GoogleTranslator,
+        BingTranslator,
+        DeepLTranslator,
+        DeepLXTranslator,
+        OllamaTranslator,
+        XinferenceTranslator,
+        AzureOpenAITranslator,
+        OpenAITranslator,
+        ZhipuTranslator,
+        ModelScopeTranslator,
+        SiliconTranslator,
+        GeminiTranslator,
+        AzureTranslator,
+        TencentTranslator,
+        DifyTranslator,
+        AnythingLLMTranslator,
+        ArgosTranslator,
+        GrokTranslator,
+        GroqTranslator,
+        DeepseekTranslator,
+        OpenAIlikedTranslator,
+        QwenMtTranslator,
+        X302AITranslator,
+    ]
+}
+
+# translators usable for babeldoc tasks: every service except OpenKoto
+BABELDOC_TRANSLATOR_MAP: Dict[str, type[BaseTranslator]] = {
+    name: translator
+    for name, translator in TRANSLATOR_MAP.items()
+    if translator is not OpenKotoTranslator
+}
+
+# target language -> default line height of the translated text
+LANG_LINEHEIGHT_MAP = {
+    "zh-cn": 1.4,
+    "zh-tw": 1.4,
+    "zh-hans": 1.4,
+    "zh-hant": 1.4,
+    "zh": 1.4,
+    "ja": 1.1,
+    "ko": 1.2,
+    "en": 1.2,
+    "ar": 1.0,
+    "ru": 0.8,
+    "uk": 0.8,
+    "ta": 0.8,
+}
+
 
 class PDFConverterEx(PDFConverter):
     def __init__(
@@ -117,6 +185,8 @@ class PDFConverterEx(PDFConverter):
 
 
 class Paragraph:
+    __slots__ = ("y", "x", "x0", "x1", "y0", "y1", "size", "brk")
+
     def __init__(self, y, x, x0, x1, y0, y1, size, brk):
         self.y: float = y  # 初始纵坐标
         self.x: float = x  # 初始横坐标
@@ -149,6 +219,9 @@ class TranslateConverter(PDFConverterEx):
         super().__init__(rsrcmgr)
         self.vfont = vfont
         self.vchar = vchar
+        self.vfont_pattern = re.compile(vfont) if vfont else None   # 用户自定义公式字体
+        self.vchar_pattern = re.compile(vchar) if vchar else None   # 用户自定义公式字符
+        self.vfont_cache: Dict[str, bool] = {}                      # 字体名 -> 是否为公式字体
         self.thread = thread
         self.layout = layout
         self.noto_name = noto_name
@@ -160,12 +233,18 @@ class TranslateConverter(PDFConverterEx):
         service_model = param[1] if len(param) > 1 else None
         if not envs:
             envs = {}
-        for translator in [OpenKotoTranslator, GoogleTranslator, BingTranslator, DeepLTranslator, DeepLXTranslator, OllamaTranslator, XinferenceTranslator, AzureOpenAITranslator,
-                           OpenAITranslator, ZhipuTranslator, ModelScopeTranslator, SiliconTranslator, GeminiTranslator, AzureTranslator, TencentTranslator, DifyTranslator, AnythingLLMTranslator, ArgosTranslator, GrokTranslator, GroqTranslator, DeepseekTranslator, OpenAIlikedTranslator, QwenMtTranslator, X302AITranslator]:
-            if service_name == translator.name:
-                self.translator = translator(lang_in, lang_out, service_model, envs=envs, prompt=prompt, ignore_cache=ignore_cache)
-        if not self.translator:
+        translator = TRANSLATOR_MAP.get(service_name)
+        if translator is None:
             raise ValueError("Unsupported translation service")
+        self.translator = translator(lang_in, lang_out, service_model, envs=envs, prompt=prompt, ignore_cache=ignore_cache)
+        # 根据目标语言获取默认行距
+        self.default_line_height = LANG_LINEHEIGHT_MAP.get(self.translator.lang_out.lower(), 1.1) # 小语种默认1.1
+        # 所有页面共用一个翻译线程池，总并发固定为 thread，也免去逐页建池
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.thread)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        super().close()
 
     def receive_layout(self, ltpage: LTPage):
         # 段落
@@ -189,36 +268,33 @@ class TranslateConverter(PDFConverterEx):
         ops: str = ""                   # 渲染结果
 
         def vflag(font: str, char: str):    # 匹配公式（和角标）字体
-            if isinstance(font, bytes):     # 不一定能 decode，直接转 str
-                try:
-                    font = font.decode('utf-8')  # 尝试使用 UTF-8 解码
-                except UnicodeDecodeError:
-                    font = ""
-            font = font.split("+")[-1]      # 字体名截断
-            if re.match(r"\(cid:", char):
+            if char.startswith("(cid:"):
+                return True
+            # 基于字体名规则的判定，结果只与字体有关，按字体缓存
+            font_flag = self.vfont_cache.get(font)
+            if font_flag is None:
+                fontname = font
+                if isinstance(fontname, bytes):     # 不一定能 decode，直接转 str
+                    try:
+                        fontname = fontname.decode('utf-8')  # 尝试使用 UTF-8 解码
+                    except UnicodeDecodeError:
+                        fontname = ""
+                fontname = fontname.split("+")[-1]  # 字体名截断
+                pattern = self.vfont_pattern or LATEX_FONT_PATTERN  # 默认匹配 latex 字体
+                font_flag = self.vfont_cache[font] = pattern.match(fontname) is not None
+            if font_flag:
                 return True
-            # 基于字体名规则的判定
-            if self.vfont:
-                if re.match(self.vfont, font):
-                    return True
-            else:
-                if re.match(                                            # latex 字体
-                    r"(CM[^R]|MS.M|XY|MT|BL|RM|EU|LA|RS|LINE|LCIRCLE|TeX-|rsfs|txsy|wasy|stmary|.*Mono|.*Code|.*Ital|.*Sym|.*Math)",
-                    font,
-                ):
-                    return True
             # 基于字符集规则的判定
-            if self.vchar:
-                if re.match(self.vchar, char):
+            if self.vchar_pattern:
+                if self.vchar_pattern.match(char):
                     return True
             else:
                 if (
                     char
                     and char != " "                                     # 非空格
                     and (
-                        unicodedata.category(char[0])
-                        in ["Lm", "Mn", "Sk", "Sm", "Zl", "Zp", "Zs"]   # 文字修饰符、数学符号、分隔符号
-                        or ord(char[0]) in range(0x370, 0x400)          # 希腊字母
+                        unicodedata.category(char[0]) in FORMULA_CATEGORIES  # 文字修饰符、数学符号、分隔符号
+                        or 0x370 <= ord(char[0]) < 0x400                    # 希腊字母
                     )
                 ):
                     return True
@@ -229,6 +305,7 @@ class TranslateConverter(PDFConverterEx):
         for child in ltpage:
             if isinstance(child, LTChar):
                 cur_v = False
+                char = child.get_text()     # 当前字符文本，后续多次使用
                 layout = self.layout[ltpage.pageid]
                 # ltpage.height 可能是 fig 里面的高度，这里统一用 layout.shape
                 h, w = layout.shape
@@ -236,22 +313,22 @@ class TranslateConverter(PDFConverterEx):
                 cx, cy = np.clip(int(child.x0), 0, w - 1), np.clip(int(child.y0), 0, h - 1)
                 cls = layout[cy, cx]
                 # 锚定文档中 bullet 的位置
-                if child.get_text() == "•":
+                if char == "•":
                     cls = 0
                 # 判定当前字符是否属于公式
                 if (                                                                                        # 判定当前字符是否属于公式
                     cls == 0                                                                                # 1. 类别为保留区域
-                    or (cls == xt_cls and len(sstk[-1].strip()) > 1 and child.size < pstk[-1].size * 0.79)  # 2. 角标字体，有 0.76 的角标和 0.799 的大写，这里用 0.79 取中，同时考虑首字母放大的情况
-                    or vflag(child.fontname, child.get_text())                                              # 3. 公式字体
+                    or (cls == xt_cls and child.size < pstk[-1].size * 0.79 and len(sstk[-1].strip()) > 1)  # 2. 角标字体，有 0.76 的角标和 0.799 的大写，这里用 0.79 取中，同时考虑首字母放大的情况
+                    or vflag(child.fontname, char)                                                          # 3. 公式字体
                     or (child.matrix[0] == 0 and child.matrix[3] == 0)                                      # 4. 垂直字体
                 ):
                     cur_v = True
                 # 判定括号组是否属于公式
                 if not cur_v:
-                    if vstk and child.get_text() == "(":
+                    if vstk and char == "(":
                         cur_v = True
                         vbkt += 1
-                    if vbkt and child.get_text() == ")":
+                    if vbkt and char == ")":
                         cur_v = True
                         vbkt -= 1
                 if (                                                        # 判定当前公式是否结束
@@ -294,10 +371,10 @@ class TranslateConverter(PDFConverterEx):
                     if (                                                    # 根据当前字符修正段落属性
                         child.size > pstk[-1].size                          # 1. 当前字符比段落字体大
                         or len(sstk[-1].strip()) == 1                       # 2. 当前字符为段落第二个文字（考虑首字母放大的情况）
-                    ) and child.get_text() != " ":                          # 3. 当前字符不是空格
+                    ) and char != " ":                                      # 3. 当前字符不是空格
                         pstk[-1].y -= child.size - pstk[-1].size            # 修正段落初始纵坐标，假设两个不同大小字符的上边界对齐
                         pstk[-1].size = child.size
-                    sstk[-1] += child.get_text()
+                    sstk[-1] += char
                 else:                                                       # 公式入栈
                     if (                                                    # 根据公式左侧的文字修正公式的纵向偏移
                         not vstk                                            # 1. 当前字符是公式的第一个字符
@@ -335,10 +412,12 @@ class TranslateConverter(PDFConverterEx):
             var.append(vstk)
             varl.append(vlstk)
             varf.append(vfix)
+        debug = log.isEnabledFor(logging.DEBUG)    # 调试日志较重，关闭时跳过格式化
         log.debug("\n==========[VSTACK]==========\n")
         for id, v in enumerate(var):  # 计算公式宽度
             l = max([vch.x1 for vch in v]) - v[0].x0
-            log.debug(f'< {l:.1f} {v[0].x0:.1f} {v[0].y0:.1f} {v[0].cid} {v[0].fontname} {len(varl[id])} > v{id} = {"".join([ch.get_text() for ch in v])}')
+            if debug:
+                log.debug(f'< {l:.1f} {v[0].x0:.1f} {v[0].y0:.1f} {v[0].cid} {v[0].fontname} {len(varl[id])} > v{id} = {"".join([ch.get_text() for ch in v])}')
             vlen.append(l)
 
         ############################################################
@@ -347,25 +426,22 @@ class TranslateConverter(PDFConverterEx):
 
         @retry(wait=wait_fixed(1))
         def worker(s: str):  # 多线程翻译
-            if not s.strip() or re.match(r"^\{v\d+\}$", s):  # 空白和公式不翻译
+            if not s.strip() or FORMULA_ONLY_PATTERN.match(s):  # 空白和公式不翻译
                 return s
             try:
                 new = self.translator.translate(s)
                 return new
             except BaseException as e:
-                if log.isEnabledFor(logging.DEBUG):
+                if debug:
                     log.exception(e)
                 else:
                     log.exception(e, exc_info=False)
                 raise e
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.thread
-        ) as executor:
-            news = list(executor.map(worker, sstk))
+        news = list(self.executor.map(worker, sstk))
 
         ############################################################
         # C. 新文档排版
-        def raw_string(fcur: str, cstk: str):  # 编码字符串
+        def raw_string(fcur: str, cstk: Iterable[str]):  # 编码字符串
             if fcur == self.noto_name:
                 return "".join(["%04x" % self.noto.has_glyph(ord(c)) for c in cstk])
             elif isinstance(self.fontmap[fcur], PDFCIDFont):  # 判断编码长度
@@ -373,12 +449,6 @@ class TranslateConverter(PDFConverterEx):
             else:
                 return "".join(["%02x" % ord(c) for c in cstk])
 
-        # 根据目标语言获取默认行距
-        LANG_LINEHEIGHT_MAP = {
-            "zh-cn": 1.4, "zh-tw": 1.4, "zh-hans": 1.4, "zh-hant": 1.4, "zh": 1.4,
-            "ja": 1.1, "ko": 1.2, "en": 1.2, "ar": 1.0, "ru": 0.8, "uk": 0.8, "ta": 0.8
-        }
-        default_line_height = LANG_LINEHEIGHT_MAP.get(self.translator.lang_out.lower(), 1.1) # 小语种默认1.1
         _x, _y = 0, 0
         ops_list = []
 
@@ -396,29 +466,29 @@ class TranslateConverter(PDFConverterEx):
             height: float = pstk[id].y1 - pstk[id].y0   # 段落高度
             size: float = pstk[id].size                 # 段落字体大小
             brk: bool = pstk[id].brk                    # 段落换行标记
-            cstk: str = ""                              # 当前文字栈
+            cstk: list[str] = []                        # 当前文字栈
             fcur: str = None                            # 当前字体 ID
             lidx = 0                                    # 记录换行次数
             tx = x
             fcur_ = fcur
             ptr = 0
-            log.debug(f"< {y} {x} {x0} {x1} {size} {brk} > {sstk[id]} | {new}")
+            nlen = len(new)                             # 译文长度，循环内不变
+            if debug:
+                log.debug(f"< {y} {x} {x0} {x1} {size} {brk} > {sstk[id]} | {new}")
 
             ops_vals: list[dict] = []
 
-            while ptr < len(new):
-                vy_regex = re.match(
-                    r"\{\s*v([\d\s]+)\}", new[ptr:], re.IGNORECASE
-                )  # 匹配 {vn} 公式标记
+            while ptr < nlen:
+                vy_regex = FORMULA_PLACEHOLDER_PATTERN.match(new, ptr)  # 匹配 {vn} 公式标记
                 mod = 0  # 文字修饰符
                 if vy_regex:  # 加载公式
-                    ptr += len(vy_regex.group(0))
-                    try:
-                        vid = int(vy_regex.group(1).replace(" ", ""))
-                        adv = vlen[vid]
-                    except Exception:
-                        continue  # 翻译器可能会自动补个越界的公式标记
-                    if var[vid][-1].get_text() and unicodedata.category(var[vid][-1].get_text()[0]) in ["Lm", "Mn", "Sk"]:  # 文字修饰符
+                    ptr = vy_regex.end()
+                    vid_str = vy_regex.group(1).replace(" ", "").strip()
+                    vid = int(vid_str) if vid_str.isdecimal() else len(vlen)
+                    if vid >= len(vlen):
+                        continue  # 翻译器可能会自动补个越界或无法解析的公式标记
+                    adv = vlen[vid]
+                    if var[vid][-1].get_text() and unicodedata.category(var[vid][-1].get_text()[0]) in MODIFIER_CATEGORIES:  # 文字修饰符
                         mod = var[vid][-1].width
                 else:  # 加载文字
                     ch = new[ptr]
@@ -450,7 +520,7 @@ class TranslateConverter(PDFConverterEx):
                             "rtxt": raw_string(fcur, cstk),
                             "lidx": lidx
                         })
-                        cstk = ""
+                        cstk = []
                 if brk and x + adv > x1 + 0.1 * size:  # 到达右边界且原文段落存在换行
                     x = x0
                     lidx += 1
@@ -469,7 +539,7 @@ class TranslateConverter(PDFConverterEx):
                             "rtxt": raw_string(self.fontid[vch.font], vc),
                             "lidx": lidx
                         })
-                        if log.isEnabledFor(logging.DEBUG):
+                        if debug:
                             lstk.append(LTLine(0.1, (_x, _y), (x + vch.x0 - var[vid][0].x0, fix + y + vch.y0 - var[vid][0].y0)))
                             _x, _y = x + vch.x0 - var[vid][0].x0, fix + y + vch.y0 - var[vid][0].y0
                     for l in varl[vid]:  # 排版公式线条
@@ -489,13 +559,13 @@ class TranslateConverter(PDFConverterEx):
                         if x == x0 and ch == " ":  # 消除段落换行空格
                             adv = 0
                         else:
-                            cstk += ch
+                            cstk.append(ch)
                     else:
-                        cstk += ch
+                        cstk.append(ch)
                 adv -= mod # 文字修饰符
                 fcur = fcur_
                 x += adv
-                if log.isEnabledFor(logging.DEBUG):
+                if debug:
                     lstk.append(LTLine(0.1, (_x, _y), (x, y)))
                     _x, _y = x, y
             # 处理结尾
@@ -510,7 +580,7 @@ class TranslateConverter(PDFConverterEx):
                     "lidx": lidx
                 })
 
-            line_height = default_line_height
+            line_height = self.default_line_height
 
             while (lidx + 1) * size * line_height > height and line_height >= 1:
                 line_height -= 0.05
@@ -63,6 +63,8 @@ class YoloResult:
 class YoloBox:
     """Helper class to store detection results from ONNX model."""
 
+    __slots__ = ("xyxy", "conf", "cls")
+
     def __init__(self, data):
         self.xyxy = data[:4]
         self.conf = data[-2]
@@ -16,6 +16,7 @@ import logging
 
 from pdf2zh import __version__
 from .high_level import translate
+from .converter import BABELDOC_TRANSLATOR_MAP
 from .doclayout import ModelInstance
 from .config import ConfigManager
 from .translator import (
@@ -289,15 +290,12 @@ def translate_file(
     lang_to = lang_map[lang_to]
 
     _envs = {}
-    for i, env in enumerate(translator.envs.items()):
-        _envs[env[0]] = envs[i]
-    for k, v in _envs.items():
+    for i, k in enumerate(translator.envs):
+        v = envs[i]
         if str(k).upper().endswith("API_KEY") and str(v) == "***":
             # Load Real API_KEYs from local configure file
-            real_keys: str = ConfigManager.get_env_by_translatername(
-                translator, k, None
-            )
-            _envs[k] = real_keys
+            v = ConfigManager.get_env_by_translatername(translator, k, None)
+        _envs[k] = v
 
     print(f"Files before translation: {os.listdir(output)}")
 
@@ -361,43 +359,17 @@ def babeldoc_translate_file(**kwargs):
     from babeldoc.high_level import async_translate as babeldoc_translate
     from babeldoc.translation_config import TranslationConfig as YadtConfig
 
-    for translator in [
-        GoogleTranslator,
-        BingTranslator,
-        DeepLTranslator,
-        DeepLXTranslator,
-        OllamaTranslator,
-        XinferenceTranslator,
-        AzureOpenAITranslator,
-        OpenAITranslator,
-        ZhipuTranslator,
-        ModelScopeTranslator,
-        SiliconTranslator,
-        GeminiTranslator,
-        AzureTranslator,
-        TencentTranslator,
-        DifyTranslator,
-        AnythingLLMTranslator,
-        ArgosTranslator,
-        GrokTranslator,
-        GroqTranslator,
-        DeepseekTranslator,
-        OpenAIlikedTranslator,
-        QwenMtTranslator,
-        X302AITranslator,
-    ]:
-        if kwargs["service"] == translator.name:
-            translator = translator(
-                kwargs["lang_in"],
-                kwargs["lang_out"],
-                "",
-                envs=kwargs["envs"],
-                prompt=kwargs["prompt"],
-                ignore_cache=kwargs["ignore_cache"],
-            )
-            break
-    else:
+    translator = BABELDOC_TRANSLATOR_MAP.get(kwargs["service"])
+    if translator is None:
         raise ValueError("Unsupported translation service")
+    translator = translator(
+        kwargs["lang_in"],
+        kwargs["lang_out"],
+        "",
+        envs=kwargs["envs"],
+        prompt=kwargs["prompt"],
+        ignore_cache=kwargs["ignore_cache"],
+    )
     import asyncio
     from babeldoc.main import create_progress_handler
 
@@ -437,11 +409,17 @@ def babeldoc_translate_file(**kwargs):
                         raise CancelledError
                     if event["type"] == "finish":
                         result = event["translate_result"]
-                        logger.info("Translation Result:")
-                        logger.info(f"  Original PDF: {result.original_pdf_path}")
-                        logger.info(f"  Time Cost: {result.total_seconds:.2f}s")
-                        logger.info(f"  Mono PDF: {result.mono_pdf_path or 'None'}")
-                        logger.info(f"  Dual PDF: {result.dual_pdf_path or 'None'}")
+                        logger.info(
+                            "Translation Result:\n"
+                            "  Original PDF: %s\n"
+                            "  Time Cost: %.2fs\n"
+                            "  Mono PDF: %s\n"
+                            "  Dual PDF: %s",
+                            result.original_pdf_path,
+                            result.total_seconds,
+                            result.mono_pdf_path or "None",
+                            result.dual_pdf_path or "None",
+                        )
                         file_mono = result.mono_pdf_path
                         file_dual = result.dual_pdf_path
                         break
@@ -794,7 +772,9 @@ def parse_user_passwd(file_path: str) -> tuple:
     try:
         with open(file_path[0], "r", encoding="utf-8") as file:
             tuple_list = [
-                tuple(line.strip().split(",")) for line in file if line.strip()
+                tuple(line.split(","))
+                for line in (raw_line.strip() for raw_line in file)
+                if line
             ]
     except FileNotFoundError:
         print(f"Error: File '{file_path[0]}' not found.")
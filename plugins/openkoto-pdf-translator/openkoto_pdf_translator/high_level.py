@@ -1,16 +1,21 @@
 """Functions that can be used for the most common use-cases for pdf2zh.six"""
 
 import asyncio
+import concurrent.futures
+import contextlib
+import functools
 import io
 import os
 import re
 import sys
 import tempfile
+import uuid
 import logging
 from asyncio import CancelledError
 from pathlib import Path
 from string import Template
 from typing import Any, BinaryIO, List, Optional, Dict
+from urllib.parse import urlparse
 
 import numpy as np
 import requests
@@ -55,6 +60,25 @@ noto_list = [
     "uk",  # Ukrainian
 ]
 
+LANG_NAME_MAP = {
+    **{la: "GoNotoKurrent-Regular.ttf" for la in noto_list},
+    **{
+        la: f"SourceHanSerif{region}-Regular.ttf"
+        for region, langs in {
+            "CN": ["zh-cn", "zh-hans", "zh"],
+            "TW": ["zh-tw", "zh-hant"],
+            "JP": ["ja"],
+            "KR": ["ko"],
+        }.items()
+        for la in langs
+    },
+}
+
+# Layout classes that are kept as-is and never translated
+LAYOUT_KEEP_CLASSES = frozenset(
+    ("abandon", "figure", "table", "isolate_formula", "formula_caption")
+)
+
 
 def check_files(files: List[str]) -> List[str]:
     files = [
@@ -110,12 +134,13 @@ def translate_patch(
     interpreter = PDFPageInterpreterEx(rsrcmgr, device, obj_patch)
     if pages:
         total_pages = len(pages)
+        pages = set(pages)  # 逐页判断是否需要翻译，集合查找为 O(1)
     else:
         total_pages = doc_zh.page_count
 
     parser = PDFParser(inf)
     doc = PDFDocument(parser)
-    with tqdm.tqdm(total=total_pages) as progress:
+    with contextlib.closing(device), tqdm.tqdm(total=total_pages) as progress:
         for pageno, page in enumerate(PDFPage.create_pages(doc)):
             if cancellation_event and cancellation_event.is_set():
                 raise CancelledError("task cancelled")
@@ -133,27 +158,22 @@ def translate_patch(
             # kdtree 是不可能 kdtree 的，不如直接渲染成图片，用空间换时间
             box = np.ones((pix.height, pix.width))
             h, w = box.shape
-            vcls = ["abandon", "figure", "table", "isolate_formula", "formula_caption"]
-            for i, d in enumerate(page_layout.boxes):
-                if page_layout.names[int(d.cls)] not in vcls:
-                    x0, y0, x1, y1 = d.xyxy.squeeze()
-                    x0, y0, x1, y1 = (
-                        np.clip(int(x0 - 1), 0, w - 1),
-                        np.clip(int(h - y1 - 1), 0, h - 1),
-                        np.clip(int(x1 + 1), 0, w - 1),
-                        np.clip(int(h - y0 + 1), 0, h - 1),
-                    )
-                    box[y0:y1, x0:x1] = i + 2
-            for i, d in enumerate(page_layout.boxes):
-                if page_layout.names[int(d.cls)] in vcls:
-                    x0, y0, x1, y1 = d.xyxy.squeeze()
-                    x0, y0, x1, y1 = (
-                        np.clip(int(x0 - 1), 0, w - 1),
-                        np.clip(int(h - y1 - 1), 0, h - 1),
-                        np.clip(int(x1 + 1), 0, w - 1),
-                        np.clip(int(h - y0 + 1), 0, h - 1),
-                    )
-                    box[y0:y1, x0:x1] = 0
+            # 一次性换算所有检测框的像素坐标（翻转 y 轴并外扩 1 像素）
+            xyxy = np.array([d.xyxy.squeeze() for d in page_layout.boxes]).reshape(-1, 4)
+            bx0 = np.clip((xyxy[:, 0] - 1).astype(int), 0, w - 1)
+            by0 = np.clip((h - xyxy[:, 3] - 1).astype(int), 0, h - 1)
+            bx1 = np.clip((xyxy[:, 2] + 1).astype(int), 0, w - 1)
+            by1 = np.clip((h - xyxy[:, 1] + 1).astype(int), 0, h - 1)
+            keep = [
+                page_layout.names[int(d.cls)] in LAYOUT_KEEP_CLASSES
+                for d in page_layout.boxes
+            ]
+            for i in range(len(keep)):
+                if not keep[i]:
+                    box[by0[i] : by1[i], bx0[i] : bx1[i]] = i + 2
+            for i in range(len(keep)):
+                if keep[i]:
+                    box[by0[i] : by1[i], bx0[i] : bx1[i]] = 0
             layout[page.pageno] = box
             # 新建一个 xref 存放新指令流
             page.page_xref = doc_zh.get_new_xref()  # hack 插入页面的新 xref
@@ -162,7 +182,6 @@ def translate_patch(
             doc_zh[page.pageno].set_contents(page.page_xref)
             interpreter.process_page(page)
 
-    device.close()
     return obj_patch
 
 
@@ -186,15 +205,18 @@ def translate_stream(
 ):
     font_list = [("tiro", None)]
 
-    font_path = download_remote_fonts(lang_out.lower())
+    # 字体可能需要下载，与文档解析并行进行
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        font_future = executor.submit(download_remote_fonts, lang_out.lower())
+        doc_en = Document(stream=stream)
+        stream = io.BytesIO()
+        doc_en.save(stream)
+        doc_zh = Document(stream=stream)
+        font_path = font_future.result()
     noto_name = NOTO_NAME
     noto = Font(noto_name, font_path)
     font_list.append((noto_name, font_path))
 
-    doc_en = Document(stream=stream)
-    stream = io.BytesIO()
-    doc_en.save(stream)
-    doc_zh = Document(stream=stream)
     page_count = doc_zh.page_count
     # font_list = [("GoNotoKurrent-Regular.ttf", font_path), ("tiro", None)]
     font_id = {}
@@ -333,6 +355,7 @@ def translate(
     result_files = []
 
     for file in files:
+        s_raw = None
         if type(file) is str and (
             file.startswith("http://") or file.startswith("https://")
         ):
@@ -340,23 +363,31 @@ def translate(
             try:
                 r = requests.get(file, allow_redirects=True)
                 if r.status_code == 200:
-                    with tempfile.NamedTemporaryFile(
-                        suffix=".pdf", delete=False
-                    ) as tmp_file:
-                        print(f"Writing the file: {file}...")
-                        tmp_file.write(r.content)
-                        file = tmp_file.name
+                    s_raw = r.content  # 直接使用下载内容，无需落盘再读回
                 else:
                     r.raise_for_status()
             except Exception as e:
                 raise PDFValueError(
                     f"Errors occur in downloading the PDF file. Please check the link(s).\nError:\n{e}"
                 )
-        filename = os.path.splitext(os.path.basename(file))[0]
+            # 只去掉字面的 .pdf 后缀（如 arxiv 的 2301.00001 不是扩展名），
+            # 并追加随机后缀，避免不同链接的输出文件互相覆盖
+            filename = os.path.basename(urlparse(file).path)
+            if filename.lower().endswith(".pdf"):
+                filename = filename[:-4]
+            filename = f"{filename or 'download'}-{uuid.uuid4().hex[:8]}"
+        else:
+            filename = os.path.splitext(os.path.basename(file))[0]
 
         # If the commandline has specified converting to PDF/A format
         # --compatible / -cp
         if compatible:
+            if s_raw is not None:  # PDF/A 转换需要文件路径
+                with tempfile.NamedTemporaryFile(
+                    suffix=".pdf", delete=False
+                ) as tmp_file:
+                    tmp_file.write(s_raw)
+                    file = tmp_file.name
             with tempfile.NamedTemporaryFile(
                 suffix="-pdfa.pdf", delete=False
             ) as tmp_pdfa:
@@ -364,10 +395,12 @@ def translate(
                 convert_to_pdfa(file, tmp_pdfa.name)
                 doc_raw = open(tmp_pdfa.name, "rb")
                 os.unlink(tmp_pdfa.name)
-        else:
+            s_raw = doc_raw.read()
+            doc_raw.close()
+        elif s_raw is None:
             doc_raw = open(file, "rb")
-        s_raw = doc_raw.read()
-        doc_raw.close()
+            s_raw = doc_raw.read()
+            doc_raw.close()
 
         temp_dir = Path(tempfile.gettempdir())
         file_path = Path(file)
@@ -397,21 +430,9 @@ def translate(
     return result_files
 
 
+@functools.lru_cache(maxsize=32)
 def download_remote_fonts(lang: str):
     lang = lang.lower()
-    LANG_NAME_MAP = {
-        **{la: "GoNotoKurrent-Regular.ttf" for la in noto_list},
-        **{
-            la: f"SourceHanSerif{region}-Regular.ttf"
-            for region, langs in {
-                "CN": ["zh-cn", "zh-hans", "zh"],
-                "TW": ["zh-tw", "zh-hant"],
-                "JP": ["ja"],
-                "KR": ["ko"],
-            }.items()
-            for la in langs
-        },
-    }
     font_name = LANG_NAME_MAP.get(lang, "GoNotoKurrent-Regular.ttf")
 
     # docker
@@ -8,9 +8,15 @@ from pdf2zh import translate_stream
 from .doclayout import ModelInstance
 from pathlib import Path
 
+import asyncio
 import contextlib
 import io
 import os
+import threading
+
+# redirect_stdout swaps the process-wide sys.stdout, so translations that
+# run on worker threads must not redirect it concurrently.
+_stdout_lock = threading.Lock()
 
 
 def create_mcp_app() -> FastMCP:
@@ -30,15 +36,20 @@ def create_mcp_app() -> FastMCP:
         with open(file, "rb") as f:
             file_bytes = f.read()
         await ctx.log(level="info", message=f"start translate {file}")
-        with contextlib.redirect_stdout(io.StringIO()):
-            doc_mono_bytes, doc_dual_bytes = translate_stream(
-                file_bytes,
-                lang_in=lang_in,
-                lang_out=lang_out,
-                service="google",
-                model=ModelInstance.value,
-                thread=4,
-            )
+
+        def _translate():
+            with _stdout_lock, contextlib.redirect_stdout(io.StringIO()):
+                return translate_stream(
+                    file_bytes,
+                    lang_in=lang_in,
+                    lang_out=lang_out,
+                    service="google",
+                    model=ModelInstance.value,
+                    thread=4,
+                )
+
+        # translate_stream is blocking, keep the event loop free while it runs
+        doc_mono_bytes, doc_dual_bytes = await asyncio.to_thread(_translate)
         await ctx.log(level="info", message="translate complete")
         output_path = Path(os.path.dirname(file))
         filename = os.path.splitext(os.path.basename(file))[0]
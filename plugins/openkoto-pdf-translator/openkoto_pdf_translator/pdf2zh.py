@@ -6,6 +6,7 @@ output it to plain text, html, xml or tags.
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import logging
 import sys
 from string import Template
@@ -13,6 +14,7 @@ from typing import List, Optional
 
 from . import __version__, log
 from .high_level import translate, download_remote_fonts
+from .converter import BABELDOC_TRANSLATOR_MAP
 from .doclayout import OnnxModel, ModelInstance
 import os
 
@@ -266,10 +268,26 @@ def main(args: Optional[List[str]] = None) -> int:
     if parsed_args.debug:
         log.setLevel(logging.DEBUG)
 
-    if parsed_args.onnx:
-        ModelInstance.value = OnnxModel(parsed_args.onnx)
-    else:
-        ModelInstance.value = OnnxModel.load_available()
+    # 命令行翻译一定会用到目标语言字体，它与版面模型的加载互不依赖，可以并行下载
+    prefetch_font = parsed_args.files and not (
+        parsed_args.interactive
+        or parsed_args.flask
+        or parsed_args.celery
+        or parsed_args.mcp
+    )
+    font_future = None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        if prefetch_font:
+            font_future = executor.submit(
+                download_remote_fonts, parsed_args.lang_out.lower()
+            )
+        if parsed_args.onnx:
+            ModelInstance.value = OnnxModel(parsed_args.onnx)
+        else:
+            ModelInstance.value = OnnxModel.load_available()
+    if font_future is not None and font_future.exception() is not None:
+        # 预取失败不中断流程，翻译时会重新下载并报告错误
+        logger.warning(f"Failed to prefetch font: {font_future.exception()}")
 
     if parsed_args.interactive:
         from .gui import setup_gui
@@ -360,69 +378,17 @@ def yadt_main(parsed_args) -> int:
         except Exception:
             raise ValueError("prompt error.")
 
-    from .translator import (
-        AzureOpenAITranslator,
-        GoogleTranslator,
-        BingTranslator,
-        DeepLTranslator,
-        DeepLXTranslator,
-        OllamaTranslator,
-        OpenAITranslator,
-        ZhipuTranslator,
-        ModelScopeTranslator,
-        SiliconTranslator,
-        GeminiTranslator,
-        AzureTranslator,
-        TencentTranslator,
-        DifyTranslator,
-        AnythingLLMTranslator,
-        XinferenceTranslator,
-        ArgosTranslator,
-        GrokTranslator,
-        GroqTranslator,
-        DeepseekTranslator,
-        OpenAIlikedTranslator,
-        QwenMtTranslator,
-        X302AITranslator,
-    )
-
-    for translator in [
-        GoogleTranslator,
-        BingTranslator,
-        DeepLTranslator,
-        DeepLXTranslator,
-        OllamaTranslator,
-        XinferenceTranslator,
-        AzureOpenAITranslator,
-        OpenAITranslator,
-        ZhipuTranslator,
-        ModelScopeTranslator,
-        SiliconTranslator,
-        GeminiTranslator,
-        AzureTranslator,
-        TencentTranslator,
-        DifyTranslator,
-        AnythingLLMTranslator,
-        ArgosTranslator,
-        GrokTranslator,
-        GroqTranslator,
-        DeepseekTranslator,
-        OpenAIlikedTranslator,
-        QwenMtTranslator,
-        X302AITranslator,
-    ]:
-        if service_name == translator.name:
-            translator = translator(
-                lang_in,
-                lang_out,
-                service_model,
-                envs=envs,
-                prompt=prompt,
-                ignore_cache=ignore_cache,
-            )
-            break
-    else:
+    translator = BABELDOC_TRANSLATOR_MAP.get(service_name)
+    if translator is None:
         raise ValueError("Unsupported translation service")
+    translator = translator(
+        lang_in,
+        lang_out,
+        service_model,
+        envs=envs,
+        prompt=prompt,
+        ignore_cache=ignore_cache,
+    )
     import asyncio
 
     for file in untranlate_file:
@@ -452,11 +418,17 @@ def yadt_main(parsed_args) -> int:
                         logger.debug(event)
                     if event["type"] == "finish":
                         result = event["translate_result"]
-                        logger.info("Translation Result:")
-                        logger.info(f"  Original PDF: {result.original_pdf_path}")
-                        logger.info(f"  Time Cost: {result.total_seconds:.2f}s")
-                        logger.info(f"  Mono PDF: {result.mono_pdf_path or 'None'}")
-                        logger.info(f"  Dual PDF: {result.dual_pdf_path or 'None'}")
+                        logger.info(
+                            "Translation Result:\n"
+                            "  Original PDF: %s\n"
+                            "  Time Cost: %.2fs\n"
+                            "  Mono PDF: %s\n"
+                            "  Dual PDF: %s",
+                            result.original_pdf_path,
+                            result.total_seconds,
+                            result.mono_pdf_path or "None",
+                            result.dual_pdf_path or "None",
+                        )
                         break
 
         asyncio.run(yadt_translate_coro(yadt_config))
@@ -40,6 +40,9 @@ from pdfminer.utils import (
 
 log = logging.getLogger(__name__)
 
+# Operator keyword -> handler name suffix, e.g. 'T*' -> 'do_T_a', '"' -> 'do__w'
+KEYWORD_METHOD_TABLE = str.maketrans({"*": "_a", '"': "_w", "'": "_q"})
+
 
 def safe_float(o: Any) -> Optional[float]:
     try:
@@ -313,10 +316,7 @@ class PDFPageInterpreterEx(PDFPageInterpreter):
                 break
             if isinstance(obj, PSKeyword):
                 name = keyword_name(obj)
-                method = "do_%s" % name.replace("*", "_a").replace('"', "_w").replace(
-                    "'",
-                    "_q",
-                )
+                method = "do_%s" % name.translate(KEYWORD_METHOD_TABLE)
                 if hasattr(self, method):
                     func = getattr(self, method)
                     nargs = func.__code__.co_argcount - 1
@@ -3,8 +3,11 @@ import json
 import logging
 import os
 import re
+import threading
+import time
 import unicodedata
 from copy import copy
+from functools import lru_cache
 from string import Template
 from typing import cast
 import deepl
@@ -34,9 +37,26 @@ logger = logging.getLogger(__name__)
 
 
 def remove_control_characters(s):
+    if s.isprintable():  # 可打印文本不含任何 C 类字符，无需逐字检查
+        return s
     return "".join(ch for ch in s if unicodedata.category(ch)[0] != "C")
 
 
+@lru_cache(maxsize=None)
+def default_prompt_prefix(lang_out: str) -> str:
+    # 默认提示词只随目标语言变化，预先拼好，逐段翻译时只需接上原文
+    return (
+        "You are a professional, authentic machine translation engine. "
+        "Only Output the translated text, do not include any other text."
+        "\n\n"
+        f"Translate the following markdown source text to {lang_out}. "
+        "Keep the formula notation {v*} unchanged. "
+        "Output translation directly without any additional text."
+        "\n\n"
+        "Source Text: "
+    )
+
+
 class BaseTranslator:
     name = "base"
     envs = {}
@@ -50,6 +70,7 @@ class BaseTranslator:
         self.lang_out = lang_out
         self.model = model
         self.ignore_cache = ignore_cache
+        self._local = threading.local()
 
         self.cache = TranslationCache(
             self.name,
@@ -65,20 +86,33 @@ class BaseTranslator:
         # Cannot use self.envs = copy(self.__class__.envs)
         # because if set_envs called twice, the second call will override the first call
         self.envs = copy(self.envs)
-        if ConfigManager.get_translator_by_name(self.name):
-            self.envs = ConfigManager.get_translator_by_name(self.name)
+        saved_envs = ConfigManager.get_translator_by_name(self.name)
+        if saved_envs:
+            self.envs = saved_envs
         needUpdate = False
         for key in self.envs:
             if key in os.environ:
                 self.envs[key] = os.environ[key]
                 needUpdate = True
-        if needUpdate:
-            ConfigManager.set_translator_by_name(self.name, self.envs)
         if envs is not None:
             for key in envs:
                 self.envs[key] = envs[key]
+            needUpdate = True
+        if needUpdate:  # 环境变量与传入参数合并后只写一次配置文件
             ConfigManager.set_translator_by_name(self.name, self.envs)
 
+    @property
+    def session(self) -> requests.Session:
+        """
+        HTTP session of the calling thread.
+        Translation runs on a thread pool and requests.Session is not thread-safe,
+        so every worker thread keeps its own pooled session.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
     def add_cache_impact_parameters(self, k: str, v):
         """
         Add parameters that affect the translation quality to distinguish the translation effects under different parameters.
@@ -93,6 +127,8 @@ class BaseTranslator:
         :param text: text to translate
         :return: translated text
         """
+        if not text.strip():  # 空白文本无需查缓存或请求翻译服务
+            return text
         if not (self.ignore_cache or ignore_cache):
             cache = self.cache.get(text)
             if cache is not None:
@@ -113,39 +149,31 @@ class BaseTranslator:
     def prompt(
         self, text: str, prompt_template: Template | None = None
     ) -> list[dict[str, str]]:
-        try:
-            return [
-                {
-                    "role": "user",
-                    "content": cast(Template, prompt_template).safe_substitute(
-                        {
-                            "lang_in": self.lang_in,
-                            "lang_out": self.lang_out,
-                            "text": text,
-                        }
-                    ),
-                }
-            ]
-        except AttributeError:  # `prompt_template` is None
-            pass
-        except Exception:
-            logging.exception("Error parsing prompt, use the default prompt.")
+        if prompt_template is not None:
+            try:
+                return [
+                    {
+                        "role": "user",
+                        "content": cast(Template, prompt_template).safe_substitute(
+                            {
+                                "lang_in": self.lang_in,
+                                "lang_out": self.lang_out,
+                                "text": text,
+                            }
+                        ),
+                    }
+                ]
+            except AttributeError:  # `prompt_template` is not a Template
+                pass
+            except Exception:
+                logging.exception("Error parsing prompt, use the default prompt.")
 
         return [
             {
                 "role": "user",
-                "content": (
-                    "You are a professional, authentic machine translation engine. "
-                    "Only Output the translated text, do not include any other text."
-                    "\n\n"
-                    f"Translate the following markdown source text to {self.lang_out}. "
-                    "Keep the formula notation {v*} unchanged. "
-                    "Output translation directly without any additional text."
-                    "\n\n"
-                    f"Source Text: {text}"
-                    "\n\n"
-                    "Translated Text:"
-                ),
+                "content": default_prompt_prefix(self.lang_out)
+                + text
+                + "\n\nTranslated Text:",
             },
         ]
 
@@ -170,8 +198,8 @@ class GoogleTranslator(BaseTranslator):
 
     def __init__(self, lang_in, lang_out, model, ignore_cache=False, **kwargs):
         super().__init__(lang_in, lang_out, model, ignore_cache)
-        self.session = requests.Session()
         self.endpoint = "https://translate.google.com/m"
+        self.result_pattern = re.compile(r'(?s)class="(?:t0|result-container)">(.*?)<')
         self.headers = {
             "User-Agent": "Mozilla/4.0 (compatible;MSIE 6.0;Windows NT 5.1;SV1;.NET CLR 1.1.4322;.NET CLR 2.0.50727;.NET CLR 3.0.04506.30)"  # noqa: E501
         }
@@ -183,14 +211,12 @@ class GoogleTranslator(BaseTranslator):
             params={"tl": self.lang_out, "sl": self.lang_in, "q": text},
             headers=self.headers,
         )
-        re_result = re.findall(
-            r'(?s)class="(?:t0|result-container)">(.*?)<', response.text
-        )
         if response.status_code == 400:
             result = "IRREPARABLE TRANSLATION ERROR"
         else:
             response.raise_for_status()
-            result = html.unescape(re_result[0])
+            re_result = self.result_pattern.search(response.text)
+            result = html.unescape(re_result.group(1))
         return remove_control_characters(result)
 
 
@@ -198,11 +224,16 @@ class BingTranslator(BaseTranslator):
     # https://github.com/immersive-translate/old-immersive-translate/blob/6df13da22664bea2f51efe5db64c63aca59c4e79/src/background/translationService.js
     name = "bing"
     lang_map = {"zh": "zh-Hans"}
+    sid_ttl = 300  # 页面令牌复用时长（秒）
 
     def __init__(self, lang_in, lang_out, model, ignore_cache=False, **kwargs):
         super().__init__(lang_in, lang_out, model, ignore_cache)
-        self.session = requests.Session()
         self.endpoint = "https://www.bing.com/translator"
+        self.ig_pattern = re.compile(r"\"ig\":\"(.*?)\"")
+        self.iid_pattern = re.compile(r"data-iid=\"(.*?)\"")
+        self.abuse_pattern = re.compile(
+            r"params_AbusePreventionHelper\s=\s\[(.*?),\"(.*?)\","
+        )
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36 Edg/131.0.0.0",  # noqa: E501
         }
@@ -211,16 +242,25 @@ class BingTranslator(BaseTranslator):
         response = self.session.get(self.endpoint)
         response.raise_for_status()
         url = response.url[:-10]
-        ig = re.findall(r"\"ig\":\"(.*?)\"", response.text)[0]
-        iid = re.findall(r"data-iid=\"(.*?)\"", response.text)[-1]
-        key, token = re.findall(
-            r"params_AbusePreventionHelper\s=\s\[(.*?),\"(.*?)\",", response.text
-        )[0]
+        ig = self.ig_pattern.search(response.text).group(1)
+        iid = self.iid_pattern.findall(response.text)[-1]
+        key, token = self.abuse_pattern.search(response.text).groups()
         return url, ig, iid, key, token
 
-    def do_translate(self, text):
-        text = text[:1000]  # bing translate max length
-        url, ig, iid, key, token = self.find_sid()
+    def get_sid(self, refresh=False):
+        """
+        Return (sid, fetched): the page tokens of the calling thread and whether they were just fetched.
+        Tokens are cached per thread (they belong to that thread's session cookies) for sid_ttl seconds.
+        """
+        cached = getattr(self._local, "sid", None)
+        if refresh or cached is None or time.monotonic() >= cached[1]:
+            cached = (self.find_sid(), time.monotonic() + self.sid_ttl)
+            self._local.sid = cached
+            return cached[0], True
+        return cached[0], False
+
+    def translate_with_sid(self, text, sid):
+        url, ig, iid, key, token = sid
         response = self.session.post(
             f"{url}ttranslatev3?IG={ig}&IID={iid}",
             data={
@@ -233,7 +273,25 @@ class BingTranslator(BaseTranslator):
             headers=self.headers,
         )
         response.raise_for_status()
-        return response.json()[0]["translations"][0]["text"]
+        result = response.json()
+        if isinstance(result, dict):  # 令牌失效时返回错误对象而不是译文列表
+            raise requests.HTTPError(
+                f"Bing rejected the request: {result}", response=response
+            )
+        return result[0]["translations"][0]["text"]
+
+    def do_translate(self, text):
+        text = text[:1000]  # bing translate max length
+        sid, fetched = self.get_sid()
+        try:
+            return self.translate_with_sid(text, sid)
+        except requests.HTTPError as e:
+            # 仅当缓存的令牌被拒绝时重新获取；限流、服务端错误等交给外层重试
+            status = e.response.status_code if e.response is not None else None
+            if fetched or status not in (200, 401, 403):
+                raise
+        sid, _ = self.get_sid(refresh=True)
+        return self.translate_with_sid(text, sid)
 
 
 class DeepLTranslator(BaseTranslator):
@@ -274,14 +332,14 @@ class DeepLXTranslator(BaseTranslator):
         self.set_envs(envs)
         super().__init__(lang_in, lang_out, model, ignore_cache)
         self.endpoint = self.envs["DEEPLX_ENDPOINT"]
-        self.session = requests.Session()
         auth_key = self.envs["DEEPLX_ACCESS_TOKEN"]
-        if auth_key:
-            self.endpoint = f"{self.endpoint}?token={auth_key}"
+        # 交给 requests 编码查询参数，令牌中的 & # + 等字符不会破坏 URL
+        self.params = {"token": auth_key} if auth_key else None
 
     def do_translate(self, text):
         response = self.session.post(
             self.endpoint,
+            params=self.params,
             json={
                 "source_lang": self.lang_in,
                 "target_lang": self.lang_out,
@@ -365,12 +423,21 @@ class XinferenceTranslator(BaseTranslator):
         self.client = xinference_client.RESTfulClient(self.envs["XINFERENCE_HOST"])
         self.prompttext = prompt
         self.add_cache_impact_parameters("temperature", self.options["temperature"])
+        self.xf_models = {}  # model uid -> model handle
+        self.last_model = None  # 上次翻译成功的模型
 
     def do_translate(self, text):
         maxlen = max(2000, len(text) * 5)
-        for model in self.model.split(";"):
+        models = self.model.split(";")
+        # 优先尝试上次成功的模型，避免每次都先等待失效模型报错
+        if self.last_model in models:
+            models.remove(self.last_model)
+            models.insert(0, self.last_model)
+        for model in models:
             try:
-                xf_model = self.client.get_model(model)
+                xf_model = self.xf_models.get(model)
+                if xf_model is None:
+                    xf_model = self.xf_models[model] = self.client.get_model(model)
                 xf_prompt = self.prompt(text, self.prompttext)
                 xf_prompt = [
                     {
@@ -390,12 +457,19 @@ class XinferenceTranslator(BaseTranslator):
                 )
                 if len(response) > maxlen:
                     raise Exception("Response too long")
+                self.last_model = model
                 return response.strip()
             except Exception as e:
                 print(e)
         raise Exception("All models failed")
 
 
+@lru_cache(maxsize=8)  # 长驻的 GUI/服务进程里只保留最近使用的少量客户端（及其密钥）
+def get_openai_client(base_url, api_key):
+    # 同一服务地址与密钥共用一个客户端，复用其连接池，避免重复握手
+    return openai.OpenAI(base_url=base_url, api_key=api_key)
+
+
 class OpenAITranslator(BaseTranslator):
     # https://github.com/openai/openai-python
     name = "openai"
@@ -422,9 +496,9 @@ class OpenAITranslator(BaseTranslator):
             model = self.envs["OPENAI_MODEL"]
         super().__init__(lang_in, lang_out, model, ignore_cache)
         self.options = {"temperature": 0}  # 随机采样可能会打断公式标记
-        self.client = openai.OpenAI(
-            base_url=base_url or self.envs["OPENAI_BASE_URL"],
-            api_key=api_key or self.envs["OPENAI_API_KEY"],
+        self.client = get_openai_client(
+            base_url or self.envs["OPENAI_BASE_URL"],
+            api_key or self.envs["OPENAI_API_KEY"],
         )
         self.prompttext = prompt
         self.add_cache_impact_parameters("temperature", self.options["temperature"])
@@ -779,7 +853,7 @@ class AnythingLLMTranslator(BaseTranslator):
             "sessionId": "translation_expert",
         }
 
-        response = requests.post(
+        response = self.session.post(
             self.api_url, headers=self.headers, data=json.dumps(payload)
         )
         response.raise_for_status()
@@ -803,13 +877,12 @@ class DifyTranslator(BaseTranslator):
         super().__init__(lang_out, lang_in, model, ignore_cache)
         self.api_url = self.envs["DIFY_API_URL"]
         self.api_key = self.envs["DIFY_API_KEY"]
-
-    def do_translate(self, text):
-        headers = {
+        self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
 
+    def do_translate(self, text):
         payload = {
             "inputs": {
                 "lang_out": self.lang_out,
@@ -821,8 +894,8 @@ class DifyTranslator(BaseTranslator):
         }
 
         # 向 Dify 服务器发送请求
-        response = requests.post(
-            self.api_url, headers=headers, data=json.dumps(payload)
+        response = self.session.post(
+            self.api_url, headers=self.headers, data=json.dumps(payload)
         )
         response.raise_for_status()
         response_data = response.json()
@@ -864,22 +937,18 @@ class ArgosTranslator(BaseTranslator):
             )
         download_path = available_package.download()
         argostranslate.package.install_from_path(download_path)
-
-    def translate(self, text: str, ignore_cache: bool = False):
-        # Translate
-        import argotranslate.translate  # noqa: F401
-
-        installed_languages = (
-            argostranslate.translate.get_installed_languages()  # noqa: F821
-        )
+        # Resolve the language pair once instead of on every call
+        installed_languages = argostranslate.translate.get_installed_languages()
         from_lang = list(filter(lambda x: x.code == self.lang_in, installed_languages))[
             0
         ]
         to_lang = list(filter(lambda x: x.code == self.lang_out, installed_languages))[
             0
         ]
-        translation = from_lang.get_translation(to_lang)
-        translatedText = translation.translate(text)
+        self.translation = from_lang.get_translation(to_lang)
+
+    def translate(self, text: str, ignore_cache: bool = False):
+        translatedText = self.translation.translate(text)
         return translatedText
 
 